@@ -0,0 +1,485 @@
+"""Offline benchmarks for the render and image preprocessing hot paths.
+
+Gemini, ElevenLabs and Google Images are replaced by local stand-ins, so no
+API keys or network access are needed:
+
+    python benchmark.py --quick
+    python benchmark.py --output results.json --compare baseline.json
+"""
+import os
+import io
+import sys
+import json
+import math
+import time
+import wave
+import shutil
+import random
+import logging
+import argparse
+import platform
+import tempfile
+import itertools
+import subprocess
+import threading
+from types import SimpleNamespace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from PIL import Image
+
+import main
+
+CANNED_SCRIPT = """Have you ever wondered why some athletes keep improving long after everyone else has stopped? Today we are going to uncover three habits that separate champions from the rest of the field.
+
+First, champions treat recovery as training. Research on elite runners shows that athletes who sleep more than eight hours per night reduce their injury rate by nearly sixty percent. Recovery days, mobility work and proper nutrition are scheduled with the same discipline as interval sessions.
+
+Second, they measure everything. Modern teams track heart rate variability, sprint speed and training load every single day. Small trends in these numbers reveal fatigue before it becomes a problem, which means coaches can adjust the plan before performance drops.
+
+Third, champions practice deliberately. Instead of repeating comfortable drills, they isolate the hardest part of a skill and repeat it under pressure. Studies of professional basketball players found that focused shooting practice improved accuracy twice as fast as casual repetition.
+
+Put together, recovery, measurement and deliberate practice create a cycle of steady progress that anyone can follow, whether you are training for a marathon or simply trying to get fitter.
+
+If this helped you, subscribe and share it with a teammate who is chasing their next personal best."""
+
+BASE_CASE = {
+    'duration': 60,
+    'images': 5,
+    'resolution': (1920, 1080),
+    'transition': 'Crossfade',
+    'outputs': 1
+}
+
+MATRIX = {
+    'duration': [30, 60, 120, 300],
+    'images': [3, 5, 10],
+    'resolution': [(1280, 720), (1920, 1080), (3840, 2160)],
+    'transition': ['Crossfade', 'Slide', 'Fade to Black', 'None'],
+    # Number of output formats rendered in one pass (first N of main.OUTPUT_FORMATS)
+    'outputs': [1, 3]
+}
+
+QUICK_MATRIX = {
+    'duration': [30],
+    'images': [3],
+    'resolution': [(1280, 720)],
+    'transition': ['Crossfade'],
+    'outputs': [1]
+}
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name):
+        self.model_name = model_name
+
+    def generate_content(self, prompt, generation_config=None):
+        return SimpleNamespace(text=CANNED_SCRIPT)
+
+
+class FakeGenai:
+    """Stand-in for the google.generativeai module."""
+
+    GenerativeModel = FakeGenerativeModel
+
+    @staticmethod
+    def configure(api_key=None):
+        pass
+
+    @staticmethod
+    def list_models():
+        return [SimpleNamespace(name="models/gemini-2.0-flash")]
+
+
+class HeadlessMessagebox:
+    @staticmethod
+    def showinfo(title, message):
+        logging.info(message)
+
+    @staticmethod
+    def showerror(title, message):
+        logging.error(message)
+
+    @staticmethod
+    def askretrycancel(title, message):
+        return False
+
+
+def make_test_image(width, height, seed):
+    """Noise over a colour gradient: compresses like a photo, unlike a flat fill."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    # A coarse random field per seed keeps difference hashes apart, so selection keeps every test image
+    coarse = Image.fromarray(rng.uniform(0, 255, (8, 9)).astype(np.uint8)).resize((width, height), Image.BILINEAR)
+    base = np.stack([
+        np.asarray(coarse, dtype=np.float32),
+        127 + 127 * np.cos(y / height * math.pi * (1 + seed % 5)),
+        np.full_like(x, (seed * 37) % 255)
+    ], axis=-1)
+    noise = rng.normal(0, 20, size=base.shape)
+    return Image.fromarray(np.clip(base + noise, 0, 255).astype(np.uint8))
+
+
+def make_test_audio(duration, sample_rate=22050):
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    samples = (0.2 * np.sin(2 * math.pi * 220 * t) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class StubServer:
+    """Local HTTP server standing in for the ElevenLabs and Google Images endpoints."""
+
+    def __init__(self):
+        self.audio_duration = 30
+        self.image_size = (1920, 1080)
+        self.image_counter = itertools.count()
+        self.cache = {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def send_body(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.startswith('/v1/user'):
+                    self.send_body(b'{"subscription": {}}', 'application/json')
+                elif self.path.startswith('/search'):
+                    self.send_body(server.search_page().encode(), 'text/html')
+                elif self.path.startswith('/images/'):
+                    seed = int(self.path.rsplit('/', 1)[-1].split('.')[0])
+                    self.send_body(server.image_bytes(seed), 'image/jpeg')
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                if self.path.startswith('/v1/text-to-speech/'):
+                    self.send_body(server.audio_bytes(), 'audio/mpeg')
+                else:
+                    self.send_error(404)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def search_page(self):
+        # The scraper skips the first <img> (Google's logo)
+        tags = ['<img src="/logo.png">'] + [
+            f'<img src="{self.url}/images/{next(self.image_counter)}.jpg">' for _ in range(4)
+        ]
+        return f"<html><body>{''.join(tags)}</body></html>"
+
+    def image_bytes(self, seed):
+        key = ('image', seed, self.image_size)
+        if key not in self.cache:
+            buffer = io.BytesIO()
+            make_test_image(*self.image_size, seed).save(buffer, 'JPEG', quality=90)
+            self.cache[key] = buffer.getvalue()
+        return self.cache[key]
+
+    def audio_bytes(self):
+        key = ('audio', self.audio_duration)
+        if key not in self.cache:
+            # WAV served as the "mp3"; ffmpeg probes the container, not the extension
+            self.cache[key] = make_test_audio(self.audio_duration)
+        return self.cache[key]
+
+    def close(self):
+        self.httpd.shutdown()
+
+
+class HeadlessApp(main.VideoCreatorApp):
+    """VideoCreatorApp without Tk widgets, dialogs or YouTube uploads."""
+
+    def __init__(self, output_dir, transition='Crossfade', duration_label='60 seconds', outputs=1,
+                 music_path=''):
+        value = lambda v: SimpleNamespace(get=lambda: v)
+        self.root = SimpleNamespace(update=lambda: None, after=lambda ms, fn=None: None)
+        self.gemini_entry = value("offline-gemini-key")
+        self.eleven_entry = value("offline-elevenlabs-key")
+        self.content_type_combo = value("Sports")
+        self.style_combo = value("Professional")
+        self.duration_combo = value(duration_label)
+        self.voice_combo = value("Professional Male")
+        self.transition_combo = value(transition)
+        self.zoom_var = value(1.03)
+        self.img_duration_var = value(5)
+        self.format_vars = {name: value(i < outputs) for i, name in enumerate(main.OUTPUT_FORMATS)}
+        self.normalize_audio_var = value(True)
+        self.music_var = value(music_path)
+        self.output_var = value(output_dir)
+        self.output_dir = output_dir
+        self.config = main.load_config()
+        self.running = True
+        self.metrics = main.PipelineMetrics()
+        self.metrics_server = None
+        self.profile_render = False
+        self.imagemagick_path = shutil.which(self.config.imagemagick_path)
+
+    def update_progress(self, value, message):
+        logging.info(f"[{value}%] {message}")
+
+    def update_status(self, message):
+        logging.info(message)
+
+    def show_error(self, message):
+        logging.error(message)
+        self.last_error = message
+
+    def show_success(self, message):
+        logging.info(message)
+
+    def save_api_keys(self):
+        pass
+
+    def upload_to_youtube(self, video_path):
+        logging.info(f"Skipping YouTube upload of {video_path} in benchmark mode")
+
+
+def install_stubs(server):
+    main.genai = FakeGenai
+    main.GEMINI_AVAILABLE = True
+    main.messagebox = HeadlessMessagebox
+    main.ELEVENLABS_API_URL = f"{server.url}/v1"
+    main.GOOGLE_IMAGES_URL = f"{server.url}/search"
+
+
+def write_images(folder, count, resolution, seed=0):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        make_test_image(*resolution, seed + i).save(os.path.join(folder, f"image_{i:03d}.jpg"), quality=90)
+
+
+def write_audio(path, duration):
+    with open(path, 'wb') as f:
+        f.write(make_test_audio(duration))
+
+
+def duration_label(seconds):
+    return f"{seconds} seconds" if seconds < 120 else f"{seconds // 60} minutes"
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    error = None
+    try:
+        fn(*args, **kwargs)
+    except Exception as e:
+        error = str(e)
+        logging.exception(f"Benchmark step {fn.__name__} failed")
+    return time.perf_counter() - start, error
+
+
+def result(suite, params, wall_seconds, error=None, app=None, skipped=None):
+    entry = {
+        'suite': suite,
+        'name': f"{suite}[" + ",".join(f"{k}={v}" for k, v in params.items()) + "]",
+        'params': params,
+        'wall_seconds': round(wall_seconds, 4),
+        'error': error,
+        'skipped': skipped
+    }
+    if app is not None:
+        entry['metrics'] = app.metrics.to_dict()
+    print(f"{entry['name']}: " + (f"skipped ({skipped})" if skipped else
+                                  f"{'FAILED ' if error else ''}{entry['wall_seconds']:.3f}s"))
+    return entry
+
+
+def bench_images(workdir, matrix):
+    results = []
+    for count, resolution in itertools.product(matrix['images'], matrix['resolution']):
+        params = {'images': count, 'resolution': f"{resolution[0]}x{resolution[1]}"}
+        folder = tempfile.mkdtemp(dir=workdir)
+        write_images(folder, count, resolution)
+        app = HeadlessApp(workdir)
+        wall, error = timed(app.get_valid_images, folder)
+        results.append(result('validate_images', params, wall, error, app))
+        # Selection deletes rejected files, so it runs on a copy and preprocessing still sees every image
+        select_folder = f"{folder}_select"
+        shutil.copytree(folder, select_folder)
+        wall, error = timed(app.select_candidate_images, select_folder, max_images=count)
+        results.append(result('select_images', params, wall, error, app))
+        shutil.rmtree(select_folder, ignore_errors=True)
+        if not app.imagemagick_path:
+            results.append(result('preprocess_images', params, 0, skipped="ImageMagick not installed"))
+        else:
+            out_folder = tempfile.mkdtemp(dir=workdir)
+
+            def preprocess_all():
+                for f in os.listdir(folder):
+                    app.preprocess_image_with_imagemagick(os.path.join(folder, f), os.path.join(out_folder, f))
+
+            wall, error = timed(preprocess_all)
+            results.append(result('preprocess_images', params, wall, error, app))
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def bench_audio(workdir, matrix):
+    results = []
+    music_path = os.path.join(workdir, "music.wav")
+    write_audio(music_path, 20)
+    for duration in matrix['duration']:
+        voice_path = os.path.join(workdir, f"voice_{duration}.wav")
+        write_audio(voice_path, duration)
+        for with_music in (False, True):
+            app = HeadlessApp(workdir)
+            cwd = os.getcwd()
+            os.chdir(workdir)
+            try:
+                wall, error = timed(app.process_audio, voice_path, music_path if with_music else '', True,
+                                    app.config.target_loudness_lufs)
+            finally:
+                os.chdir(cwd)
+            results.append(result('process_audio', {'duration': duration, 'music': with_music}, wall, error, app))
+    return results
+
+
+def render_cases(matrix, full_matrix):
+    keys = list(BASE_CASE)
+    if full_matrix:
+        for values in itertools.product(*(matrix[k] for k in keys)):
+            yield dict(zip(keys, values))
+        return
+    # Vary one factor at a time around the base case
+    base = {k: BASE_CASE[k] if BASE_CASE[k] in matrix[k] else matrix[k][0] for k in keys}
+    seen = set()
+    for key in keys:
+        for value in matrix[key]:
+            case = dict(base, **{key: value})
+            ident = tuple(case[k] for k in keys)
+            if ident not in seen:
+                seen.add(ident)
+                yield case
+
+
+def bench_render(workdir, matrix, full_matrix):
+    results = []
+    for case in render_cases(matrix, full_matrix):
+        params = dict(case, resolution=f"{case['resolution'][0]}x{case['resolution'][1]}")
+        folder = tempfile.mkdtemp(dir=workdir)
+        write_images(folder, case['images'], case['resolution'])
+        audio_path = os.path.join(folder, "voiceover.wav")
+        write_audio(audio_path, case['duration'])
+        app = HeadlessApp(workdir, transition=case['transition'], outputs=case['outputs'])
+        wall, error = timed(app.create_video_with_effects, folder, audio_path)
+        results.append(result('render', params, wall, error, app))
+        shutil.rmtree(folder, ignore_errors=True)
+    return results
+
+
+def bench_pipeline(workdir, server, matrix):
+    results = []
+    if not shutil.which(main.load_config().imagemagick_path):
+        for duration in matrix['duration']:
+            results.append(result('pipeline', {'duration': duration}, 0, skipped="ImageMagick not installed"))
+        return results
+    for duration in matrix['duration']:
+        server.audio_duration = duration
+        job_dir = tempfile.mkdtemp(dir=workdir)
+        app = HeadlessApp(job_dir, duration_label=duration_label(duration))
+        app.last_error = None
+        cwd = os.getcwd()
+        os.chdir(job_dir)
+        try:
+            wall, error = timed(app.create_content)
+        finally:
+            os.chdir(cwd)
+        results.append(result('pipeline', {'duration': duration}, wall, error or app.last_error, app))
+    return results
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def compare(results, baseline_path, threshold):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r['name']: r for r in json.load(f)['results']}
+    regressions = []
+    for entry in results:
+        before = baseline.get(entry['name'])
+        if not before or entry['error'] or entry['skipped'] or before['error'] or before['skipped']:
+            continue
+        if before['wall_seconds'] > 0:
+            change = entry['wall_seconds'] / before['wall_seconds'] - 1
+            marker = "REGRESSION" if change > threshold else "ok"
+            print(f"{marker:>10}  {entry['name']}: {before['wall_seconds']:.3f}s -> {entry['wall_seconds']:.3f}s ({change:+.1%})")
+            if change > threshold:
+                regressions.append(entry['name'])
+    return regressions
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for AI Content Creation Tool")
+    parser.add_argument("--suite", default="images,audio,render,pipeline",
+                        help="comma separated suites to run: images, audio, render, pipeline")
+    parser.add_argument("--quick", action="store_true", help="run the smallest case of each suite")
+    parser.add_argument("--full-matrix", action="store_true",
+                        help="render every combination instead of varying one factor at a time")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="relative slowdown reported as a regression (default 0.15)")
+    args = parser.parse_args(argv)
+
+    logging.getLogger().setLevel(logging.WARNING)
+    random.seed(0)
+    matrix = QUICK_MATRIX if args.quick else MATRIX
+    suites = [s.strip() for s in args.suite.split(",") if s.strip()]
+    server = StubServer()
+    install_stubs(server)
+    workdir = tempfile.mkdtemp(prefix="ai_content_bench_")
+    results = []
+    try:
+        if "images" in suites:
+            results += bench_images(workdir, matrix)
+        if "audio" in suites:
+            results += bench_audio(workdir, matrix)
+        if "render" in suites:
+            results += bench_render(workdir, matrix, args.full_matrix)
+        if "pipeline" in suites:
+            results += bench_pipeline(workdir, server, matrix)
+    finally:
+        server.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({'environment': environment_info(), 'results': results}, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,214 @@
+"""Settings and API key storage shared by the GUI, the benchmarks and worker processes.
+
+Settings come from defaults, then ``config.toml`` in the config directory,
+then ``AI_CONTENT_<SETTING>`` environment variables. API keys live in the
+system keyring when the ``keyring`` package is installed, otherwise in a
+``secrets.json`` readable only by the current user.
+
+This module only uses the standard library so it stays cheap to import.
+"""
+import os
+import sys
+import json
+import shutil
+import pickle
+import logging
+import functools
+from dataclasses import dataclass, field, fields
+from typing import Optional, Union, get_args, get_origin
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+try:
+    import keyring
+    KEYRING_AVAILABLE = True
+except ImportError:
+    KEYRING_AVAILABLE = False
+
+ENV_PREFIX = "AI_CONTENT_"
+KEYRING_SERVICE = "ai-content-creator"
+SECRET_NAMES = ("gemini", "elevenlabs")
+LEGACY_API_KEYS_FILE = "api_keys.pkl"
+
+
+def default_config_dir():
+    if os.environ.get(f"{ENV_PREFIX}CONFIG_DIR"):
+        return os.environ[f"{ENV_PREFIX}CONFIG_DIR"]
+    if sys.platform == "win32":
+        return os.path.join(os.environ.get("APPDATA", os.path.expanduser("~")), "AI_Content_Creator")
+    return os.path.join(os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config")), "ai_content_creator")
+
+
+def default_imagemagick_path():
+    windows_default = r"C:\Program Files\ImageMagick\magick.exe"
+    if sys.platform == "win32" and os.path.exists(windows_default):
+        return windows_default
+    found = shutil.which("magick")
+    if not found and sys.platform != "win32":
+        # ImageMagick 6 ships only "convert"; on Windows that name is the FAT-to-NTFS system tool
+        found = shutil.which("convert")
+    return found or "magick"
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    config_dir: str = field(default_factory=default_config_dir)
+    output_dir: str = field(default_factory=lambda: os.path.join(os.path.expanduser("~"), "Desktop", "AI_Videos_Pro"))
+    imagemagick_path: str = field(default_factory=default_imagemagick_path)
+    youtube_client_secrets: str = "client_secrets.json"
+    # Relative paths below are resolved against config_dir
+    youtube_token_file: str = "youtube_token.json"
+    upload_queue_file: str = "upload_queue.json"
+    upload_chunk_size: int = 8 * 1024 * 1024
+    target_loudness_lufs: float = -14.0
+    metrics_port: Optional[int] = None
+    profile_render: bool = False
+
+    def path(self, name):
+        """Resolve a file setting relative to the config directory."""
+        return os.path.join(self.config_dir, getattr(self, name))
+
+
+def coerce(value, annotation):
+    if get_origin(annotation) is Union:
+        if value is None or value == "":
+            return None
+        annotation = next(arg for arg in get_args(annotation) if arg is not type(None))
+    if annotation is bool and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return annotation(value)
+
+
+@functools.lru_cache(maxsize=None)
+def load_config():
+    """Load settings once per process: defaults < config.toml < environment variables."""
+    defaults = AppConfig()
+    config_dir = defaults.config_dir
+    values = {}
+    config_file = os.path.join(config_dir, "config.toml")
+    if os.path.exists(config_file):
+        if tomllib is None:
+            logging.warning(f"Ignoring {config_file}: install 'tomli' to read TOML on Python < 3.11")
+        else:
+            try:
+                with open(config_file, 'rb') as f:
+                    values.update(tomllib.load(f))
+            except Exception as e:
+                logging.error(f"Error loading {config_file}: {str(e)}")
+    for f in fields(AppConfig):
+        env_value = os.environ.get(f"{ENV_PREFIX}{f.name.upper()}")
+        if env_value is not None:
+            values[f.name] = env_value
+    kwargs = {}
+    for f in fields(AppConfig):
+        if f.name in values:
+            try:
+                kwargs[f.name] = coerce(values[f.name], f.type)
+            except (TypeError, ValueError) as e:
+                logging.error(f"Invalid value for setting {f.name}: {str(e)}")
+    config = AppConfig(**kwargs)
+    os.makedirs(config.config_dir, exist_ok=True)
+    return config
+
+
+class _NoGlobalsUnpickler(pickle.Unpickler):
+    """The legacy key file is a dict of strings; anything referencing code is rejected."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Refusing to load {module}.{name} from {LEGACY_API_KEYS_FILE}")
+
+
+class SecretStore:
+    """API keys from environment variables, the system keyring or a private JSON file."""
+
+    def __init__(self, config=None):
+        self.config = config or load_config()
+        self.secrets_file = os.path.join(self.config.config_dir, "secrets.json")
+        self.cache = None
+
+    def read_file(self):
+        try:
+            if os.path.exists(self.secrets_file):
+                with open(self.secrets_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading API keys: {str(e)}")
+        return {}
+
+    def write_file(self, secrets):
+        tmp_path = f"{self.secrets_file}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(secrets, f)
+        os.replace(tmp_path, self.secrets_file)
+
+    def migrate_legacy(self):
+        if not os.path.exists(LEGACY_API_KEYS_FILE):
+            return {}
+        try:
+            with open(LEGACY_API_KEYS_FILE, 'rb') as f:
+                legacy = _NoGlobalsUnpickler(f).load()
+            secrets = {name: str(legacy.get(name, '')) for name in SECRET_NAMES}
+            self.save(secrets)
+            os.remove(LEGACY_API_KEYS_FILE)
+            logging.info(f"Migrated API keys from {LEGACY_API_KEYS_FILE}")
+            return secrets
+        except Exception as e:
+            logging.error(f"Could not migrate {LEGACY_API_KEYS_FILE}: {str(e)}")
+            return {}
+
+    def env_secrets(self):
+        """Keys set through ``AI_CONTENT_<NAME>_API_KEY``, e.g. for headless workers."""
+        secrets = {}
+        for name in SECRET_NAMES:
+            env_value = os.environ.get(f"{ENV_PREFIX}{name.upper()}_API_KEY")
+            if env_value:
+                secrets[name] = env_value
+        return secrets
+
+    def load(self):
+        if self.cache is None:
+            stored = {}
+            if KEYRING_AVAILABLE:
+                try:
+                    stored = {name: keyring.get_password(KEYRING_SERVICE, name) or '' for name in SECRET_NAMES}
+                except Exception as e:
+                    logging.warning(f"Keyring unavailable, falling back to {self.secrets_file}: {str(e)}")
+                    stored = self.read_file()
+            else:
+                stored = self.read_file()
+            if not any(stored.values()):
+                stored = self.migrate_legacy() or stored
+            self.cache = {name: stored.get(name, '') for name in SECRET_NAMES}
+        # Environment variables win over stored keys
+        return {**self.cache, **self.env_secrets()}
+
+    def save(self, secrets):
+        """Persist keys; a no-op when nothing changed.
+
+        A value equal to its environment override is never written, so keys
+        handed to a worker through the environment stay out of the store.
+        """
+        env = self.env_secrets()
+        stored = self.cache or {}
+        secrets = {name: stored.get(name, '') if name in env and secrets.get(name) == env[name]
+                   else secrets.get(name, '')
+                   for name in SECRET_NAMES}
+        if secrets == self.cache:
+            return
+        if KEYRING_AVAILABLE:
+            try:
+                for name, value in secrets.items():
+                    keyring.set_password(KEYRING_SERVICE, name, value)
+                self.cache = secrets
+                return
+            except Exception as e:
+                logging.warning(f"Keyring unavailable, falling back to {self.secrets_file}: {str(e)}")
+        self.write_file(secrets)
+        self.cache = secrets
@@ -3,18 +3,7 @@ import io
 import requests
 from bs4 import BeautifulSoup
 import json
-from moviepy import (
-    VideoClip,
-    VideoFileClip,
-    ImageSequenceClip,
-    ImageClip,
-    TextClip,
-    ColorClip,
-    AudioFileClip,
-    AudioClip,
-    CompositeVideoClip,
-    vfx,
-)
+import math
 import sys
 import re
 from PIL import Image, ImageDraw, ImageFont
@@ -28,18 +17,46 @@ import subprocess
 import numpy as np
 from docx import Document
 import time
-import pickle
+import wave
+import queue
+import threading
+import importlib.util
+import cProfile
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from pathlib import Path
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
+from config import load_config, SecretStore
 
+# moviepy, googleapiclient and google.generativeai are slow to import, so they
+# are imported inside the stages that use them.
 try:
-    import google.generativeai as genai
-    GEMINI_AVAILABLE = True
-except ImportError:
+    GEMINI_AVAILABLE = importlib.util.find_spec("google.generativeai") is not None
+except ModuleNotFoundError:
     GEMINI_AVAILABLE = False
+if not GEMINI_AVAILABLE:
     logging.warning("google.generativeai not available")
+genai = None
+
+def get_genai():
+    global genai
+    if genai is None:
+        import google.generativeai
+        genai = google.generativeai
+    return genai
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
 
 # Configure logging
 logging.basicConfig(
@@ -48,20 +65,603 @@ logging.basicConfig(
     filename='ai_content_creator.log'
 )
 
+# Output formats rendered from one shared timeline: name -> (width, height, file suffix)
+OUTPUT_FORMATS = {
+    "16:9 1080p": (1920, 1080, ""),
+    "9:16 Shorts": (1080, 1920, "_shorts"),
+    "1:1 Square": (1080, 1080, "_square"),
+    "16:9 720p": (1280, 720, "_720p"),
+}
+DEFAULT_OUTPUT_FORMAT = "16:9 1080p"
+
+# x264 settings shared by the single- and multi-output renderers, tried in order
+ENCODER_PROFILES = [
+    {'preset': 'slow', 'crf': '18', 'bitrate': '8000k', 'threads': 4,
+     'ffmpeg_params': ['-pix_fmt', 'yuv420p', '-movflags', '+faststart']},
+    {'preset': 'fast', 'crf': '23', 'bitrate': None, 'threads': 2,
+     'ffmpeg_params': ['-pix_fmt', 'yuv420p']},
+]
+
+# Audio post-processing; the loudness target itself is AppConfig.target_loudness_lufs
+AUDIO_SAMPLE_RATE = 44100
+MUSIC_BED_OFFSET_LU = -10.0
+# Sample peak ceiling for the limiter (no oversampling, so not a true-peak measure)
+PEAK_CEILING_DB = -1.0
+
+# Remote endpoints; overridable so the pipeline can run against local stand-ins
+ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1"
+GOOGLE_IMAGES_URL = "https://www.google.com/webhp?as_st=y&as_q=&as_epq=&as_oq=&as_eq=&imgsz=xga&imgar=&imgcolor=&imgtype=&cr=countryUS&as_sitesearch=&tbs=&udm=2"
+
+def peak_rss_bytes():
+    if RESOURCE_AVAILABLE:
+        # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+    if PSUTIL_AVAILABLE and sys.platform == 'win32':
+        # Windows has no resource module; the peak working set is the equivalent
+        return psutil.Process().memory_info().peak_wset
+    return None
+
+class PipelineMetrics:
+    """Per-job stage timings and counters, exported as JSON next to the video."""
+
+    def __init__(self, job_id=None):
+        self.job_id = job_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        self.stages = {}
+        self.counters = {'bytes_downloaded': 0, 'frames_rendered': 0}
+        self.api_calls = {}
+        self.render_fps = None
+        self.json_path = None
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.stages[name] = {
+                    'wall_seconds': round(time.perf_counter() - wall_start, 4),
+                    # Process-wide CPU time; excludes child processes such as ffmpeg
+                    'cpu_seconds': round(time.process_time() - cpu_start, 4)
+                }
+
+    def add(self, counter, value):
+        with self.lock:
+            self.counters[counter] = self.counters.get(counter, 0) + value
+
+    def record_api_call(self, api, latency, retries=0, ok=True):
+        with self.lock:
+            stats = self.api_calls.setdefault(api, {'calls': 0, 'failures': 0, 'retries': 0, 'latency_seconds': 0.0})
+            stats['calls'] += 1
+            stats['failures'] += 0 if ok else 1
+            stats['retries'] += retries
+            stats['latency_seconds'] = round(stats['latency_seconds'] + latency, 4)
+
+    def record_render(self, frames, wall_seconds):
+        self.add('frames_rendered', frames)
+        self.render_fps = round(frames / wall_seconds, 2) if wall_seconds > 0 else None
+
+    def to_dict(self):
+        with self.lock:
+            return {
+                'job_id': self.job_id,
+                'started_at': self.started_at,
+                'stages': dict(self.stages),
+                'counters': dict(self.counters),
+                'api_calls': {api: dict(stats) for api, stats in self.api_calls.items()},
+                'render_fps': self.render_fps,
+                'peak_rss_bytes': peak_rss_bytes()
+            }
+
+    def write_json(self, path=None):
+        self.json_path = path or self.json_path
+        if not self.json_path:
+            return
+        try:
+            with open(self.json_path, 'w', encoding='utf-8') as f:
+                json.dump(self.to_dict(), f, indent=2)
+        except Exception as e:
+            logging.warning(f"Could not write metrics to {self.json_path}: {str(e)}")
+
+    def to_prometheus(self):
+        data = self.to_dict()
+        job = data['job_id']
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP ai_content_{name} {help_text}")
+            lines.append(f"# TYPE ai_content_{name} gauge")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in [('job', job)] + labels)
+                lines.append(f"ai_content_{name}{{{label_text}}} {value}")
+
+        metric('stage_wall_seconds', "Wall time per pipeline stage",
+               [([('stage', name)], st['wall_seconds']) for name, st in data['stages'].items()])
+        metric('stage_cpu_seconds', "Process CPU time per pipeline stage",
+               [([('stage', name)], st['cpu_seconds']) for name, st in data['stages'].items()])
+        metric('bytes_downloaded', "Bytes downloaded from remote APIs", [([], data['counters']['bytes_downloaded'])])
+        metric('frames_rendered', "Video frames rendered", [([], data['counters']['frames_rendered'])])
+        if data['render_fps'] is not None:
+            metric('render_fps', "Frames rendered per second", [([], data['render_fps'])])
+        for key in ('calls', 'failures', 'retries', 'latency_seconds'):
+            metric(f'api_{key}', f"API {key.replace('_', ' ')} per service",
+                   [([('api', api)], stats[key]) for api, stats in data['api_calls'].items()])
+        if data['peak_rss_bytes'] is not None:
+            metric('peak_rss_bytes', "Peak resident set size of the process", [([], data['peak_rss_bytes'])])
+        return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """Serves the most recent job's metrics in Prometheus text format."""
+
+    def __init__(self, port):
+        self.latest = None
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip('/') != '/metrics':
+                    self.send_error(404)
+                    return
+                body = server.latest.to_prometheus().encode() if server.latest else b""
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        logging.info(f"Metrics endpoint listening on http://127.0.0.1:{port}/metrics")
+
+    def publish(self, metrics):
+        self.latest = metrics
+
+def decode_audio(path, sample_rate=AUDIO_SAMPLE_RATE, channels=2):
+    """Decode any audio file ffmpeg understands into a float32 (samples, channels) array."""
+    import imageio_ffmpeg
+    cmd = [
+        imageio_ffmpeg.get_ffmpeg_exe(), "-loglevel", "error", "-i", path,
+        "-f", "f32le", "-acodec", "pcm_f32le", "-ac", str(channels), "-ar", str(sample_rate), "-"
+    ]
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, channels)
+
+def write_wav(path, samples, sample_rate=AUDIO_SAMPLE_RATE):
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype('<i2')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(samples.shape[1])
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm.tobytes())
+
+def k_weighting_response(num_samples, sample_rate):
+    """Frequency response of the ITU-R BS.1770 K-weighting filter at the rfft bins."""
+    def biquad_response(b, a, z):
+        return (b[0] + b[1] / z + b[2] / z ** 2) / (a[0] + a[1] / z + a[2] / z ** 2)
+
+    z = np.exp(1j * 2 * np.pi * np.fft.rfftfreq(num_samples, 1 / sample_rate) / sample_rate)
+    # Stage 1: high shelf (+4 dB above ~1.5 kHz) modelling the head
+    gain, q, fc = 4.0, 1 / np.sqrt(2), 1500.0
+    A = 10 ** (gain / 40)
+    w0 = 2 * np.pi * fc / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    shelf_b = [A * ((A + 1) + (A - 1) * np.cos(w0) + 2 * np.sqrt(A) * alpha),
+               -2 * A * ((A - 1) + (A + 1) * np.cos(w0)),
+               A * ((A + 1) + (A - 1) * np.cos(w0) - 2 * np.sqrt(A) * alpha)]
+    shelf_a = [(A + 1) - (A - 1) * np.cos(w0) + 2 * np.sqrt(A) * alpha,
+               2 * ((A - 1) - (A + 1) * np.cos(w0)),
+               (A + 1) - (A - 1) * np.cos(w0) - 2 * np.sqrt(A) * alpha]
+    # Stage 2: RLB high pass at ~38 Hz
+    q, fc = 0.5, 38.0
+    w0 = 2 * np.pi * fc / sample_rate
+    alpha = np.sin(w0) / (2 * q)
+    hp_b = [(1 + np.cos(w0)) / 2, -(1 + np.cos(w0)), (1 + np.cos(w0)) / 2]
+    hp_a = [1 + alpha, -2 * np.cos(w0), 1 - alpha]
+    return biquad_response(shelf_b, shelf_a, z) * biquad_response(hp_b, hp_a, z)
+
+def moving_average(values, window):
+    """Forward-looking moving average of a 1-D array (edge value repeated past the end)."""
+    window = max(int(window), 1)
+    padded = np.concatenate((values, np.full(window - 1, values[-1] if len(values) else 0)))
+    cumulative = np.concatenate(([0.0], np.cumsum(padded, dtype=np.float64)))
+    return (cumulative[window:window + len(values)] - cumulative[:len(values)]) / window
+
+def running_minimum(values, window):
+    """Backward-looking running minimum of a 1-D array (van Herk/Gil-Werman, no per-sample loops)."""
+    window = max(int(window), 1)
+    n = len(values)
+    blocks = -(-(n + window - 1) // window)
+    padded = np.full(blocks * window, np.inf)
+    padded[window - 1:window - 1 + n] = values
+    padded = padded.reshape(blocks, window)
+    prefix = np.minimum.accumulate(padded, axis=1).ravel()
+    suffix = np.minimum.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    # Window ending at padded index i + window - 1 spans at most two blocks
+    return np.minimum(suffix[:n], prefix[window - 1:window - 1 + n])
+
+def integrated_loudness(samples, sample_rate=AUDIO_SAMPLE_RATE):
+    """Gated integrated loudness (LUFS) per ITU-R BS.1770-4, computed without per-sample loops."""
+    if len(samples) < int(0.4 * sample_rate):
+        return None
+    response = k_weighting_response(len(samples), sample_rate)
+    block, hop = int(0.4 * sample_rate), int(0.1 * sample_rate)
+    starts = np.arange(0, len(samples) - block + 1, hop)
+    block_power = np.zeros(len(starts))
+    for channel in range(samples.shape[1]):
+        weighted = np.fft.irfft(np.fft.rfft(samples[:, channel]) * response, n=len(samples))
+        cumulative = np.concatenate(([0.0], np.cumsum(weighted.astype(np.float64) ** 2)))
+        block_power += (cumulative[starts + block] - cumulative[starts]) / block
+    with np.errstate(divide='ignore'):
+        block_loudness = -0.691 + 10 * np.log10(block_power)
+    gated = block_power[block_loudness > -70.0]
+    if not gated.size:
+        return None
+    relative_gate = -0.691 + 10 * np.log10(gated.mean()) - 10.0
+    gated = block_power[(block_loudness > -70.0) & (block_loudness > relative_gate)]
+    return float(-0.691 + 10 * np.log10(gated.mean())) if gated.size else None
+
+def limit_peaks(samples, sample_rate=AUDIO_SAMPLE_RATE, ceiling_db=PEAK_CEILING_DB, lookahead=0.005, hold=0.05):
+    """Look-ahead limiter that keeps every sample under the ceiling with a smooth gain curve.
+
+    The gain each sample needs is held at its running minimum over the
+    look-ahead plus hold time, then averaged forward over the look-ahead, so
+    the gain starts falling before a peak arrives and never exceeds what any
+    sample it covers needs.
+    """
+    if not len(samples):
+        return samples
+    ceiling = 10 ** (ceiling_db / 20)
+    # Channels share one gain so the stereo image does not shift
+    peak = np.abs(samples).max(axis=1)
+    needed = np.minimum(ceiling / np.maximum(peak, 1e-12), 1.0)
+    attack = max(int(lookahead * sample_rate), 1)
+    held = running_minimum(needed, attack + int(hold * sample_rate))
+    gain = moving_average(held, attack)
+    return (samples * gain[:, None]).astype(np.float32)
+
+def normalize_loudness(samples, target_lufs, sample_rate=AUDIO_SAMPLE_RATE):
+    loudness = integrated_loudness(samples, sample_rate)
+    if loudness is None:
+        logging.warning("Audio too short or silent to measure loudness; leaving level unchanged")
+        return samples
+    return (samples * 10 ** ((target_lufs - loudness) / 20)).astype(np.float32)
+
+def ducking_gain(voice, sample_rate=AUDIO_SAMPLE_RATE, threshold_db=-45.0, depth_db=-12.0,
+                 attack=0.05, release=0.4):
+    """Per-sample gain for the music bed that dips whenever the voice is active."""
+    power = moving_average(np.mean(voice ** 2, axis=1), 0.05 * sample_rate)
+    with np.errstate(divide='ignore'):
+        active = 10 * np.log10(power) > threshold_db
+    # Stay ducked until the voice has been quiet for the release time
+    window = max(int(release * sample_rate), 1)
+    cumulative = np.concatenate(([0], np.cumsum(active)))
+    held = cumulative[1:] - cumulative[np.maximum(np.arange(1, len(active) + 1) - window, 0)] > 0
+    target = np.where(held, 10 ** (depth_db / 20), 1.0)
+    # Forward-looking average ramps the gain over the attack time, starting just before speech
+    return moving_average(target, attack * sample_rate).astype(np.float32)[:, None]
+
+def mix_voice_and_music(voice, music, target_lufs, sample_rate=AUDIO_SAMPLE_RATE, normalize=True):
+    if normalize:
+        voice = normalize_loudness(voice, target_lufs, sample_rate)
+    mix = voice
+    if music is not None and len(music):
+        # Loop or trim the bed to the voiceover and fade it out over the last two seconds
+        music = np.resize(music, (len(voice), music.shape[1]))
+        music = normalize_loudness(music, target_lufs + MUSIC_BED_OFFSET_LU, sample_rate)
+        fade = min(len(music), 2 * sample_rate)
+        music[len(music) - fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)[:, None]
+        mix = voice + music * ducking_gain(voice, sample_rate)
+        if normalize:
+            mix = normalize_loudness(mix, target_lufs, sample_rate)
+    return limit_peaks(mix, sample_rate) if normalize else mix
+
+# Renders run on the Tk thread; pump its events this often so a Cancel click gets through
+CANCEL_POLL_FRAMES = 12
+
+class RenderCancelled(Exception):
+    """Raised from the frame loop when the user cancels a render."""
+
+class StreamingSlideshow:
+    """Renders the slideshow frame by frame with bounded memory.
+
+    Each slide is decoded shortly before it becomes active and released once
+    its outgoing transition is over, and frames are written into a small ring
+    of preallocated buffers, so peak memory does not grow with video length.
+    """
+
+    def __init__(self, image_files, duration_per_image, size=(1920, 1080), zoom=1.03,
+                 transition="Crossfade", transition_duration=0.5, prefetch_seconds=1.0, ring_size=3):
+        self.image_files = list(image_files)
+        self.slide_duration = duration_per_image
+        self.duration = duration_per_image * len(self.image_files)
+        self.size = size
+        self.zoom = max(zoom, 1.0)
+        # Zoom runs over the first 80% of each slide, then holds
+        self.zoom_duration = duration_per_image * 0.8
+        self.transition = transition
+        self.transition_duration = min(transition_duration, duration_per_image / 2)
+        self.prefetch_seconds = prefetch_seconds
+        width, height = size
+        self.ring = [np.zeros((height, width, 3), dtype=np.uint8) for _ in range(ring_size)]
+        self.ring_index = 0
+        # Fixed scratch space for transition blends (uint16 holds 255 * 256)
+        self.blend = [np.zeros((height, width, 3), dtype=np.uint16) for _ in range(2)]
+        self.slides = {}
+        self.pending = {}
+        self.held_frames = {}
+        self.decoder = ThreadPoolExecutor(max_workers=1)
+
+    def decode_slide(self, index):
+        width, height = self.size
+        # Oversize by the zoom factor so zoomed frames are cropped, never upscaled
+        target_w, target_h = int(round(width * self.zoom)), int(round(height * self.zoom))
+        with Image.open(self.image_files[index]) as img:
+            img.draft("RGB", (target_w, target_h))
+            img = img.convert("RGB")
+            scale = max(target_w / img.width, target_h / img.height)
+            resized_w, resized_h = max(target_w, round(img.width * scale)), max(target_h, round(img.height * scale))
+            left, top = (resized_w - target_w) // 2, (resized_h - target_h) // 2
+            return img.resize((resized_w, resized_h), Image.LANCZOS).crop((left, top, left + target_w, top + target_h))
+
+    def get_slide(self, index):
+        if index not in self.slides:
+            future = self.pending.pop(index, None)
+            self.slides[index] = future.result() if future else self.decode_slide(index)
+        return self.slides[index]
+
+    def prefetch(self, index):
+        if 0 <= index < len(self.image_files) and index not in self.slides and index not in self.pending:
+            self.pending[index] = self.decoder.submit(self.decode_slide, index)
+
+    def release_except(self, keep):
+        for index in [i for i in self.slides if i not in keep]:
+            del self.slides[index]
+        for index in [i for i in self.held_frames if i not in keep]:
+            del self.held_frames[index]
+
+    def slide_frame(self, index, local_t):
+        """Zoomed frame of one slide as a uint8 array (read-only, may be cached)."""
+        progress = min(local_t / self.zoom_duration, 1.0) if self.zoom_duration > 0 else 1.0
+        if progress >= 1.0 and index in self.held_frames:
+            return self.held_frames[index]
+        slide = self.get_slide(index)
+        scale = 1.0 + (self.zoom - 1.0) * progress
+        crop_w, crop_h = slide.width / scale, slide.height / scale
+        left, top = (slide.width - crop_w) / 2, (slide.height - crop_h) / 2
+        frame = np.asarray(slide.resize(self.size, Image.BILINEAR, box=(left, top, left + crop_w, top + crop_h)))
+        if progress >= 1.0:
+            # Once the zoom has finished the slide is static; reuse the frame
+            self.held_frames[index] = frame
+        return frame
+
+    def make_frame(self, t):
+        count = len(self.image_files)
+        index = min(int(t // self.slide_duration), count - 1)
+        local_t = t - index * self.slide_duration
+        in_transition = index > 0 and self.transition != "None" and local_t < self.transition_duration
+        keep = {index, index + 1} | ({index - 1} if in_transition else set())
+        self.release_except(keep)
+        if local_t >= self.slide_duration - self.prefetch_seconds:
+            self.prefetch(index + 1)
+
+        out = self.ring[self.ring_index]
+        self.ring_index = (self.ring_index + 1) % len(self.ring)
+        current = self.slide_frame(index, local_t)
+        td = self.transition_duration
+        if in_transition and self.transition == "Crossfade":
+            previous = self.slide_frame(index - 1, self.slide_duration)
+            # 8-bit fixed-point blend entirely inside the preallocated buffers
+            weight = np.uint16(round(256 * local_t / td))
+            np.multiply(previous, np.uint16(256) - weight, out=self.blend[0], dtype=np.uint16)
+            np.multiply(current, weight, out=self.blend[1], dtype=np.uint16)
+            np.add(self.blend[0], self.blend[1], out=self.blend[0])
+            np.right_shift(self.blend[0], 8, out=self.blend[0])
+            np.copyto(out, self.blend[0], casting='unsafe')
+        elif in_transition and self.transition == "Slide":
+            # Incoming slide enters from the left over the previous one
+            width = self.size[0]
+            offset = int(width * (1.0 - local_t / td))
+            np.copyto(out, self.slide_frame(index - 1, self.slide_duration))
+            out[:, :width - offset] = current[:, offset:]
+        elif self.transition == "Fade to Black" and (
+                in_transition or (index < count - 1 and local_t > self.slide_duration - td)):
+            level = local_t / td if in_transition else (self.slide_duration - local_t) / td
+            np.multiply(current, np.uint16(round(256 * min(max(level, 0.0), 1.0))), out=self.blend[0], dtype=np.uint16)
+            np.right_shift(self.blend[0], 8, out=self.blend[0])
+            np.copyto(out, self.blend[0], casting='unsafe')
+        else:
+            np.copyto(out, current)
+        return out
+
+    def close(self):
+        self.decoder.shutdown(wait=True)
+        self.pending.clear()
+        self.slides.clear()
+        self.held_frames.clear()
+
+def master_canvas_size(target_sizes, max_height=None):
+    """Smallest 16:9 canvas whose centre crops cover every target without upscaling.
+
+    A 9:16 1080x1920 target therefore needs a 3412x1920 canvas (widths
+    are kept even for libx264). Pass max_height to trade output sharpness
+    for render speed.
+    """
+    needed = 0
+    for width, height in target_sizes:
+        # Narrower targets are limited by canvas height, wider ones by canvas width
+        needed = max(needed, height if width / height <= 16 / 9 else width * 9 / 16)
+    if max_height:
+        needed = min(needed, max_height)
+    height = int(math.ceil(needed / 2)) * 2
+    return int(round(height * 16 / 9)) // 2 * 2, height
+
+class MultiFormatWriter:
+    """Encodes one stream of master frames into several outputs concurrently.
+
+    Each target gets its own ffmpeg process and feeder thread; the feeder
+    crops the master frame to the target's aspect ratio and scales it, so
+    the timeline itself is only evaluated once per frame.
+    """
+
+    def __init__(self, targets, master_size, fps=24, audio_file=None, profile=ENCODER_PROFILES[0]):
+        self.targets = targets
+        self.master_size = master_size
+        self.fps = fps
+        self.audio_file = audio_file
+        self.profile = profile
+        self.processes = []
+        self.queues = []
+        self.threads = []
+        self.errors = []
+
+    def ffmpeg_command(self, output_path, size):
+        import imageio_ffmpeg
+        cmd = [
+            imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-vcodec", "rawvideo",
+            "-s", f"{size[0]}x{size[1]}", "-pix_fmt", "rgb24", "-r", str(self.fps), "-i", "-"
+        ]
+        if self.audio_file:
+            cmd += ["-i", self.audio_file, "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac"]
+        cmd += ["-c:v", "libx264", "-preset", self.profile['preset'], "-crf", self.profile['crf'],
+                "-threads", str(self.profile['threads'])]
+        if self.profile['bitrate']:
+            cmd += ["-b:v", self.profile['bitrate']]
+        return cmd + self.profile['ffmpeg_params'] + [output_path]
+
+    def crop_box(self, size):
+        master_w, master_h = self.master_size
+        if size[0] / size[1] <= master_w / master_h:
+            crop_w, crop_h = master_h * size[0] / size[1], master_h
+        else:
+            crop_w, crop_h = master_w, master_w * size[1] / size[0]
+        left, top = (master_w - crop_w) / 2, (master_h - crop_h) / 2
+        return left, top, left + crop_w, top + crop_h
+
+    def feed(self, process, frames, size):
+        box = self.crop_box(size)
+        passthrough = tuple(size) == tuple(self.master_size)
+        try:
+            while True:
+                frame = frames.get()
+                if frame is None:
+                    break
+                if not passthrough:
+                    frame = np.asarray(Image.fromarray(frame).resize(size, Image.BILINEAR, box=box))
+                process.stdin.write(frame.tobytes())
+        except Exception as e:
+            self.errors.append(e)
+            # Keep draining so the producer never blocks on a dead encoder
+            while frames.get() is not None:
+                pass
+        finally:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+
+    def start(self):
+        for output_path, size in self.targets:
+            process = subprocess.Popen(self.ffmpeg_command(output_path, size),
+                                       stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+            frames = queue.Queue(maxsize=4)
+            thread = threading.Thread(target=self.feed, args=(process, frames, size), daemon=True)
+            thread.start()
+            self.processes.append(process)
+            self.queues.append(frames)
+            self.threads.append(thread)
+
+    def write_frame(self, frame):
+        # Frames may come from a reused ring buffer; the feeders need a stable copy
+        frame = np.array(frame, dtype=np.uint8, copy=True)
+        for frames in self.queues:
+            frames.put(frame)
+
+    def close(self):
+        for frames in self.queues:
+            frames.put(None)
+        for thread in self.threads:
+            thread.join()
+        for (output_path, _), process in zip(self.targets, self.processes):
+            stderr = process.stderr.read().decode(errors="replace")
+            if process.wait() != 0:
+                self.errors.append(RuntimeError(f"ffmpeg failed for {output_path}: {stderr.strip()}"))
+        if self.errors:
+            raise self.errors[0]
+
 class YouTubeAPI:
-    def __init__(self):
+    def __init__(self, chunk_size=None, max_retries=5):
+        config = load_config()
         # Path to your client secrets file (download from Google Cloud Console)
-        self.CLIENT_SECRETS_FILE = "client_secrets.json"
+        self.CLIENT_SECRETS_FILE = config.youtube_client_secrets
+        # Cached OAuth credentials so the browser flow only runs once
+        self.TOKEN_FILE = config.path('youtube_token_file')
         self.SCOPES = ['https://www.googleapis.com/auth/youtube.upload']
+        # Must be a multiple of 256 KiB for resumable uploads
+        self.chunk_size = chunk_size or config.upload_chunk_size
+        self.max_retries = max_retries
         self.youtube = self.authenticate()
 
     def authenticate(self):
-        flow = InstalledAppFlow.from_client_secrets_file(
-            self.CLIENT_SECRETS_FILE, self.SCOPES)
-        credentials = flow.run_local_server(port=0)
+        from googleapiclient.discovery import build
+        from google.auth.transport.requests import Request as GoogleAuthRequest
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        credentials = None
+        if os.path.exists(self.TOKEN_FILE):
+            try:
+                credentials = Credentials.from_authorized_user_file(self.TOKEN_FILE, self.SCOPES)
+            except Exception as e:
+                logging.warning(f"Could not load cached YouTube credentials: {str(e)}")
+        if credentials and credentials.expired and credentials.refresh_token:
+            try:
+                credentials.refresh(GoogleAuthRequest())
+            except Exception as e:
+                logging.warning(f"Could not refresh YouTube credentials: {str(e)}")
+                credentials = None
+        if not credentials or not credentials.valid:
+            flow = InstalledAppFlow.from_client_secrets_file(
+                self.CLIENT_SECRETS_FILE, self.SCOPES)
+            credentials = flow.run_local_server(port=0)
+        self.save_credentials(credentials)
         return build('youtube', 'v3', credentials=credentials)
 
-    def upload_video(self, file_path, title, description, category_id='22', privacy_status='private'):
+    def save_credentials(self, credentials):
+        try:
+            fd = os.open(self.TOKEN_FILE, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                f.write(credentials.to_json())
+        except Exception as e:
+            logging.warning(f"Could not cache YouTube credentials: {str(e)}")
+
+    @staticmethod
+    def resync_upload(request):
+        """Make the next next_chunk() call ask the server how many bytes it already has.
+
+        googleapiclient has no public API for this. HttpRequest.next_chunk()
+        sends an empty "Content-Range: bytes */<size>" status query when the
+        private _in_error_state flag is set (google-api-python-client 2.x,
+        pinned in requirements.txt). Fail loudly if that ever changes.
+        """
+        if not hasattr(request, '_in_error_state'):
+            import googleapiclient.version
+            raise RuntimeError(
+                f"google-api-python-client {googleapiclient.version.__version__} cannot resume uploads; "
+                "install a 2.x release")
+        request._in_error_state = True
+
+    def upload_video(self, file_path, title, description, category_id='22', privacy_status='private',
+                     resumable_uri=None, on_session=None, on_progress=None, on_retry=None):
+        import httplib2
+        from googleapiclient.errors import HttpError
+        from googleapiclient.http import MediaFileUpload
         try:
             body = {
                 'snippet': {
@@ -74,7 +674,7 @@ class YouTubeAPI:
                 }
             }
 
-            media = MediaFileUpload(file_path, resumable=True)
+            media = MediaFileUpload(file_path, chunksize=self.chunk_size, resumable=True)
 
             request = self.youtube.videos().insert(
                 part='snippet,status',
@@ -82,13 +682,196 @@ class YouTubeAPI:
                 media_body=media
             )
 
-            response = request.execute()
+            if resumable_uri:
+                # Resume an interrupted session: ask the server how much it already has
+                request.resumable_uri = resumable_uri
+                self.resync_upload(request)
+                logging.info(f"Resuming YouTube upload of {file_path}")
+            http = SessionRecordingHttp(request, on_session, resumable_uri)
+
+            response = None
+            failures = 0
+            while response is None:
+                try:
+                    # Retries are handled by this loop only, so num_retries stays 0
+                    status, response = request.next_chunk(http=http)
+                    failures = 0
+                except HttpError as e:
+                    if e.resp.status in (404, 410) and resumable_uri:
+                        # The stored session expired on the server; start a fresh upload
+                        logging.warning(f"Upload session for {file_path} expired, restarting")
+                        if on_retry:
+                            on_retry()
+                        return self.upload_video(file_path, title, description, category_id, privacy_status,
+                                                 on_session=on_session, on_progress=on_progress, on_retry=on_retry)
+                    if e.resp.status not in (429, 500, 502, 503, 504):
+                        raise
+                    failures += 1
+                    if failures > self.max_retries:
+                        raise
+                    if on_retry:
+                        on_retry()
+                    logging.warning(f"Upload chunk failed (HTTP {e.resp.status}), retrying in {2 ** failures}s")
+                    time.sleep(2 ** failures)
+                    continue
+                except (httplib2.HttpLib2Error, OSError) as e:
+                    failures += 1
+                    if failures > self.max_retries:
+                        raise
+                    if on_retry:
+                        on_retry()
+                    logging.warning(f"Upload chunk failed ({str(e)}), retrying in {2 ** failures}s")
+                    time.sleep(2 ** failures)
+                    if request.resumable_uri:
+                        # Re-sync the byte offset with the server before sending the next chunk
+                        self.resync_upload(request)
+                    continue
+                if status and on_progress:
+                    on_progress(status.progress())
             logging.info(f"Video uploaded successfully: {response['id']}")
             return response
         except Exception as e:
             logging.error(f"YouTube upload failed: {str(e)}")
             raise
 
+class SessionRecordingHttp:
+    """Wraps a request's http object to report the resumable session URI before any chunk is sent.
+
+    next_chunk() creates the session and uploads the first chunk in one call,
+    so this is the only point where a crash mid-chunk cannot lose the URI.
+    """
+
+    def __init__(self, request, on_session, reported_uri=None):
+        self.http = request.http
+        self.upload_request = request
+        self.on_session = on_session
+        self.reported_uri = reported_uri
+
+    def request(self, uri, *args, **kwargs):
+        session_uri = self.upload_request.resumable_uri
+        if session_uri and uri == session_uri and session_uri != self.reported_uri:
+            self.reported_uri = session_uri
+            if self.on_session:
+                self.on_session(session_uri)
+        return self.http.request(uri, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.http, name)
+
+class UploadManager:
+    """Background YouTube upload queue whose pending jobs survive restarts."""
+
+    def __init__(self, state_file=None):
+        self.state_file = state_file or load_config().path('upload_queue_file')
+        self.youtube_api = None
+        self.jobs = queue.Queue()
+        # Events for the UI thread: (kind, file_path, payload)
+        self.events = queue.Queue()
+        self.lock = threading.Lock()
+        # In-memory only: uploads resumed after a restart have no job metrics
+        self.metrics = {}
+        self.worker = threading.Thread(target=self.run, daemon=True)
+        self.worker.start()
+
+    def load_state(self):
+        try:
+            if os.path.exists(self.state_file):
+                with open(self.state_file, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+        except Exception as e:
+            logging.error(f"Error loading upload queue: {str(e)}")
+        return {}
+
+    def update_state(self, file_path, entry):
+        with self.lock:
+            state = self.load_state()
+            if entry is None:
+                state.pop(file_path, None)
+            else:
+                state[file_path] = entry
+            tmp_path = f"{self.state_file}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, self.state_file)
+
+    def submit(self, file_path, title, description, category_id='22', privacy_status='private', metrics=None):
+        file_path = os.path.abspath(file_path)
+        if metrics:
+            self.metrics[file_path] = metrics
+        entry = {
+            'title': title,
+            'description': description,
+            'category_id': category_id,
+            'privacy_status': privacy_status,
+            'size': os.path.getsize(file_path),
+            'resumable_uri': None
+        }
+        self.update_state(file_path, entry)
+        self.jobs.put(file_path)
+        logging.info(f"Queued YouTube upload: {file_path}")
+
+    def resume_pending(self):
+        """Re-queue uploads left unfinished by a previous session."""
+        resumed = 0
+        for file_path, entry in self.load_state().items():
+            if not os.path.exists(file_path) or os.path.getsize(file_path) != entry.get('size'):
+                logging.warning(f"Dropping stale upload for {file_path}")
+                self.update_state(file_path, None)
+                continue
+            self.jobs.put(file_path)
+            resumed += 1
+        return resumed
+
+    def run(self):
+        while True:
+            file_path = self.jobs.get()
+            try:
+                entry = self.load_state().get(file_path)
+                if entry is None:
+                    continue
+                if not self.youtube_api:
+                    self.youtube_api = YouTubeAPI()
+
+                def on_session(uri, entry=entry, file_path=file_path):
+                    entry['resumable_uri'] = uri
+                    self.update_state(file_path, entry)
+
+                retries = 0
+
+                def on_retry():
+                    nonlocal retries
+                    retries += 1
+
+                metrics = self.metrics.pop(file_path, None) or PipelineMetrics()
+                try:
+                    with metrics.stage('upload_to_youtube'):
+                        start = time.perf_counter()
+                        try:
+                            response = self.youtube_api.upload_video(
+                                file_path=file_path,
+                                title=entry['title'],
+                                description=entry['description'],
+                                category_id=entry['category_id'],
+                                privacy_status=entry['privacy_status'],
+                                resumable_uri=entry.get('resumable_uri'),
+                                on_session=on_session,
+                                on_progress=lambda progress, file_path=file_path: self.events.put(('progress', file_path, progress)),
+                                on_retry=on_retry
+                            )
+                        except Exception:
+                            metrics.record_api_call('youtube', time.perf_counter() - start, retries=retries, ok=False)
+                            raise
+                    metrics.record_api_call('youtube', time.perf_counter() - start, retries=retries)
+                finally:
+                    metrics.write_json()
+                self.update_state(file_path, None)
+                self.events.put(('done', file_path, response['id']))
+            except Exception as e:
+                # Keep the entry so the upload resumes on the next start
+                self.events.put(('error', file_path, str(e)))
+            finally:
+                self.jobs.task_done()
+
 class VideoCreatorApp:
     def __init__(self, root):
         self.root = root
@@ -99,35 +882,40 @@ class VideoCreatorApp:
         self.title_font = tkfont.Font(family="Segoe UI", size=24, weight="bold")
         self.subtitle_font = tkfont.Font(family="Segoe UI", size=12)
         self.button_font = tkfont.Font(family="Segoe UI", size=12, weight="bold")
-        self.api_keys_file = "api_keys.pkl"
+        self.config = load_config()
+        self.secrets = SecretStore(self.config)
         self.saved_api_keys = self.load_api_keys()
         self.setup_ui()
         self.create_output_folder()
         self.running = False
-        self.youtube_api = None
-        self.imagemagick_path = r"C:\Program Files\ImageMagick\magick.exe"
+        self.metrics = PipelineMetrics()
+        # Opt-in instrumentation: Prometheus endpoint and cProfile around the render loop
+        self.metrics_server = MetricsServer(self.config.metrics_port) if self.config.metrics_port else None
+        self.profile_render = self.config.profile_render
+        self.upload_manager = UploadManager()
+        if self.upload_manager.resume_pending():
+            self.update_status("Resuming unfinished YouTube uploads...")
+        self.root.after(500, self.poll_upload_events)
+        self.imagemagick_path = self.config.imagemagick_path
 
     def load_api_keys(self):
         try:
-            if os.path.exists(self.api_keys_file):
-                with open(self.api_keys_file, 'rb') as f:
-                    return pickle.load(f)
+            return self.secrets.load()
         except Exception as e:
             logging.error(f"Error loading API keys: {str(e)}")
         return {'gemini': '', 'elevenlabs': ''}
 
     def save_api_keys(self):
         try:
-            with open(self.api_keys_file, 'wb') as f:
-                pickle.dump({
-                    'gemini': self.gemini_entry.get().strip(),
-                    'elevenlabs': self.eleven_entry.get().strip()
-                }, f)
+            self.secrets.save({
+                'gemini': self.gemini_entry.get().strip(),
+                'elevenlabs': self.eleven_entry.get().strip()
+            })
         except Exception as e:
             logging.error(f"Error saving API keys: {str(e)}")
 
     def create_output_folder(self):
-        self.output_dir = os.path.join(os.path.expanduser("~"), "Desktop", "AI_Videos_Pro")
+        self.output_dir = self.config.output_dir
         os.makedirs(self.output_dir, exist_ok=True)
 
     def setup_ui(self):
@@ -152,6 +940,7 @@ class VideoCreatorApp:
         self.setup_api_tab()
         self.setup_content_tab()
         self.setup_effects_tab()
+        self.setup_audio_tab()
         button_frame = ttk.Frame(main_frame)
         button_frame.pack(fill="x", pady=20)
         ttk.Button(
@@ -226,7 +1015,7 @@ class VideoCreatorApp:
         output_frame.pack(fill="x", pady=10)
         ttk.Label(output_frame, text="Save Location:", font=self.button_font).pack(side="left", padx=5)
         self.output_var = tk.StringVar()
-        self.output_var.set(os.path.join(os.path.expanduser("~"), "Desktop", "AI_Videos_Pro"))
+        self.output_var.set(self.config.output_dir)
         ttk.Entry(output_frame, textvariable=self.output_var, font=self.subtitle_font).pack(side="left", expand=True, fill="x", padx=5)
         ttk.Button(
             output_frame,
@@ -256,6 +1045,42 @@ class VideoCreatorApp:
         ttk.Label(duration_frame, text="Image Duration (sec):", font=self.button_font).pack(side="left", padx=5)
         self.img_duration_var = tk.IntVar(value=5)
         ttk.Entry(duration_frame, textvariable=self.img_duration_var, width=5).pack(side="right", padx=5)
+        formats_card = ttk.LabelFrame(effects_tab, text="Output Formats", padding=20)
+        formats_card.pack(fill="x", pady=10)
+        self.format_vars = {}
+        for i, name in enumerate(OUTPUT_FORMATS):
+            self.format_vars[name] = tk.BooleanVar(value=name == DEFAULT_OUTPUT_FORMAT)
+            ttk.Checkbutton(formats_card, text=name, variable=self.format_vars[name]).grid(row=i // 2, column=i % 2, sticky="w", padx=5, pady=2)
+
+    def setup_audio_tab(self):
+        audio_tab = ttk.Frame(self.notebook, padding=20)
+        self.notebook.add(audio_tab, text="Audio")
+        audio_card = ttk.LabelFrame(audio_tab, text="Audio Post-Processing", padding=20)
+        audio_card.pack(fill="x", pady=10)
+        self.normalize_audio_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            audio_card,
+            text=f"Normalize loudness ({self.config.target_loudness_lufs:g} LUFS)",
+            variable=self.normalize_audio_var
+        ).pack(anchor="w", pady=5)
+        music_frame = ttk.Frame(audio_card)
+        music_frame.pack(fill="x", pady=5)
+        ttk.Label(music_frame, text="Background Music:", font=self.button_font).pack(side="left", padx=5)
+        self.music_var = tk.StringVar()
+        ttk.Entry(music_frame, textvariable=self.music_var).pack(side="left", expand=True, fill="x", padx=5)
+        ttk.Button(
+            music_frame,
+            text="Browse...",
+            command=self.select_music_file
+        ).pack(side="right", padx=5)
+
+    def select_music_file(self):
+        path = filedialog.askopenfilename(
+            title="Select Background Music",
+            filetypes=[("Audio files", "*.mp3 *.wav *.m4a *.aac *.ogg *.flac"), ("All files", "*.*")]
+        )
+        if path:
+            self.music_var.set(path)
 
     def select_output_folder(self):
         folder = filedialog.askdirectory(title="Select Output Folder")
@@ -267,12 +1092,13 @@ class VideoCreatorApp:
         try:
             if not GEMINI_AVAILABLE:
                 raise ImportError("google.generativeai package not installed")
+            genai = get_genai()
             genai.configure(api_key=self.gemini_entry.get().strip())
             models = genai.list_models()
             if not models:
                 raise ValueError("No models found - check your API key")
             headers = {"xi-api-key": self.eleven_entry.get().strip()}
-            response = requests.get("https://api.elevenlabs.io/v1/user", headers=headers, timeout=10)
+            response = requests.get(f"{ELEVENLABS_API_URL}/user", headers=headers, timeout=10)
             response.raise_for_status()
             self.save_api_keys()
             messagebox.showinfo("Success", "Both API connections are working!")
@@ -364,12 +1190,42 @@ class VideoCreatorApp:
             logging.warning(f"ImageMagick preprocessing failed for {image_path}: {str(e)}")
             return False
 
+    def process_audio(self, voiceover_path, music_path, normalize, target_lufs):
+        """Loudness-normalise the voiceover and mix in the ducked music bed; returns the track to mux.
+
+        Runs on a worker thread, so it must not touch Tk widgets or variables.
+        """
+        if not normalize and not music_path:
+            return voiceover_path
+        try:
+            with self.metrics.stage("process_audio"):
+                voice = decode_audio(voiceover_path)
+                music = None
+                if music_path:
+                    try:
+                        music = decode_audio(music_path)
+                    except Exception as e:
+                        logging.warning(f"Could not decode background music {music_path}: {str(e)}")
+                mix = mix_voice_and_music(voice, music, target_lufs=target_lufs, normalize=normalize)
+                mixed_path = "temp_mixed_audio.wav"
+                write_wav(mixed_path, mix)
+            logging.info(f"Processed audio written to {mixed_path}")
+            return mixed_path
+        except Exception as e:
+            logging.warning(f"Audio post-processing failed, using raw voiceover: {str(e)}")
+            return voiceover_path
+
     def create_content(self):
         if not self.running:
             return
+        self.metrics = PipelineMetrics()
+        if self.metrics_server:
+            self.metrics_server.publish(self.metrics)
+        audio_future = None
         try:
             self.update_progress(10, "Generating script...")
-            script = self.generate_script()
+            with self.metrics.stage("generate_script"):
+                script = self.generate_script()
             if not script or not self.running:
                 return
             if not self.validate_script(script):
@@ -379,33 +1235,57 @@ class VideoCreatorApp:
             if not script_path or not self.running:
                 return
             self.update_progress(30, "Generating voiceover...")
-            voiceover_path = self.generate_voiceover(script)
+            with self.metrics.stage("generate_voiceover"):
+                voiceover_path = self.generate_voiceover(script)
             if not voiceover_path or not self.running:
                 return
+            # Audio processing runs alongside the image stages; Tk values are read here on the main thread
+            audio_executor = ThreadPoolExecutor(max_workers=1)
+            audio_future = audio_executor.submit(
+                self.process_audio,
+                voiceover_path,
+                self.music_var.get().strip(),
+                self.normalize_audio_var.get(),
+                self.config.target_loudness_lufs
+            )
+            audio_executor.shutdown(wait=False)
             self.update_progress(50, "Downloading images...")
             image_folder = "temp_images"
             os.makedirs(image_folder, exist_ok=True)
-            self.download_images(script, image_folder)
+            with self.metrics.stage("download_images"):
+                self.download_images(script, image_folder)
+            if not self.running:
+                return
+            self.update_progress(55, "Selecting best images...")
+            with self.metrics.stage("select_images"):
+                self.select_candidate_images(image_folder)
             if not self.running:
                 return
             self.update_progress(60, "Preprocessing images with ImageMagick...")
             # Preprocess images using ImageMagick
             processed_image_folder = "processed_images"
             os.makedirs(processed_image_folder, exist_ok=True)
-            for img_file in os.listdir(image_folder):
-                img_path = os.path.join(image_folder, img_file)
-                processed_img_path = os.path.join(processed_image_folder, f"processed_{img_file}")
-                if not self.preprocess_image_with_imagemagick(img_path, processed_img_path):
-                    continue
+            with self.metrics.stage("preprocess_images"):
+                for img_file in os.listdir(image_folder):
+                    img_path = os.path.join(image_folder, img_file)
+                    processed_img_path = os.path.join(processed_image_folder, f"processed_{img_file}")
+                    if not self.preprocess_image_with_imagemagick(img_path, processed_img_path):
+                        continue
+            self.update_progress(75, "Processing audio...")
+            audio_path = audio_future.result()
             self.update_progress(80, "Creating video...")
-            video_path = self.create_video_with_effects(processed_image_folder, voiceover_path)
+            with self.metrics.stage("create_video_with_effects"):
+                video_path = self.create_video_with_effects(processed_image_folder, audio_path)
             self.cleanup_temp_files(image_folder, voiceover_path, processed_image_folder)
-            self.update_progress(90, "Uploading to YouTube...")
+            self.update_progress(90, "Queueing YouTube upload...")
             self.upload_to_youtube(video_path)
             self.update_progress(100, "Process completed!")
-            self.show_success(f"Video created and uploaded successfully!\n\nSaved to:\n{video_path}")
-            if os.path.exists(video_path):
+            self.show_success(f"Video created successfully! YouTube upload continues in the background.\n\nSaved to:\n{video_path}")
+            if os.path.exists(video_path) and os.name == 'nt':
                 subprocess.Popen(f'explorer "{os.path.dirname(video_path)}"')
+        except RenderCancelled:
+            logging.info("Render cancelled")
+            self.update_status("Creation cancelled")
         except Exception as e:
             self.show_error(f"Content creation failed: {str(e)}")
             logging.exception("Content creation error")
@@ -413,6 +1293,15 @@ class VideoCreatorApp:
                 self.start_creation_process()
         finally:
             self.running = False
+            if audio_future is not None:
+                # Let a still-running mix finish before deleting its output
+                mixed_path = audio_future.result()
+                if mixed_path != voiceover_path and os.path.exists(mixed_path):
+                    try:
+                        os.remove(mixed_path)
+                    except OSError as e:
+                        logging.warning(f"Could not delete {mixed_path}: {str(e)}")
+            self.metrics.write_json(os.path.join(self.output_var.get(), f"AI_Video_metrics_{self.metrics.job_id}.json"))
             if hasattr(self, 'progress_window') and self.progress_window:
                 self.progress_window.destroy()
 
@@ -421,20 +1310,27 @@ class VideoCreatorApp:
             api_key = self.gemini_entry.get().strip()
             if not api_key:
                 raise ValueError("Gemini API key is required")
+            genai = get_genai()
             genai.configure(api_key=api_key)
             content_type = self.content_type_combo.get()
             duration = self.duration_combo.get()
             style = self.style_combo.get()
             prompt = f"""Craft a compelling {duration} YouTube script paragraph about {content_type} delivered in a {style} Style, incorporating an engaging hook, three distinct key points each supported by factual details, and smooth transitions between these points. Conclude with a clear call to action. The tone should be engaging, targeting a general YouTube audience. Ensure the content is factual, well-structured for narration, avoids filler, and maintains consistent quality, The script should be at least 150 words."""
             model = genai.GenerativeModel('gemini-2.0-flash')
-            response = model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.3,
-                    "top_p": 0.7,
-                    "max_output_tokens": 2000
-                }
-            )
+            start = time.perf_counter()
+            try:
+                response = model.generate_content(
+                    prompt,
+                    generation_config={
+                        "temperature": 0.3,
+                        "top_p": 0.7,
+                        "max_output_tokens": 2000
+                    }
+                )
+            except Exception:
+                self.metrics.record_api_call('gemini', time.perf_counter() - start, ok=False)
+                raise
+            self.metrics.record_api_call('gemini', time.perf_counter() - start)
             if not response.text:
                 raise ValueError("Empty response from Gemini API")
             return response.text
@@ -514,10 +1410,11 @@ class VideoCreatorApp:
             }
             voiceover_path = os.path.join("temp_voiceover.mp3")
             for attempt in range(max_retries):
+                start = time.perf_counter()
                 try:
                     self.update_status(f"Generating voiceover (Attempt {attempt + 1}/{max_retries})")
                     response = requests.post(
-                        f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
+                        f"{ELEVENLABS_API_URL}/text-to-speech/{voice_id}",
                         json=data,
                         headers=headers,
                         timeout=timeout_duration
@@ -527,19 +1424,23 @@ class VideoCreatorApp:
                         for chunk in response.iter_content(chunk_size=1024):
                             if chunk and self.running:
                                 f.write(chunk)
+                                self.metrics.add('bytes_downloaded', len(chunk))
                             else:
                                 raise Exception("Process cancelled")
+                    self.metrics.record_api_call('elevenlabs', time.perf_counter() - start, retries=attempt)
                     if os.path.exists(voiceover_path) and os.path.getsize(voiceover_path) > 0:
                         self.save_api_keys()
                         return voiceover_path
                     else:
                         raise ValueError("Voiceover file was not created properly")
                 except requests.exceptions.Timeout:
+                    self.metrics.record_api_call('elevenlabs', time.perf_counter() - start, retries=attempt, ok=False)
                     if attempt < max_retries - 1:
                         time.sleep(retry_delay)
                         continue
                     raise
                 except requests.exceptions.RequestException as e:
+                    self.metrics.record_api_call('elevenlabs', time.perf_counter() - start, retries=attempt, ok=False)
                     if attempt < max_retries - 1:
                         time.sleep(retry_delay)
                         continue
@@ -598,11 +1499,14 @@ class VideoCreatorApp:
                 "hl": "en",
                 "tbs": "isz:l"
             }
+            start = time.perf_counter()
             response = requests.get(
-                "https://www.google.com/webhp?as_st=y&as_q=&as_epq=&as_oq=&as_eq=&imgsz=xga&imgar=&imgcolor=&imgtype=&cr=countryUS&as_sitesearch=&tbs=&udm=2",
+                GOOGLE_IMAGES_URL,
                 params=params,
                 headers={"User-Agent": "Mozilla/5.0"}
             )
+            self.metrics.record_api_call('google_images', time.perf_counter() - start, ok=response.ok)
+            self.metrics.add('bytes_downloaded', len(response.content))
             response.raise_for_status()
             soup = BeautifulSoup(response.text, 'html.parser')
             images = soup.find_all('img', limit=count+1)
@@ -613,6 +1517,7 @@ class VideoCreatorApp:
                     img_url = img['src']
                     if img_url.startswith('http'):
                         img_data = requests.get(img_url, timeout=15).content
+                        self.metrics.add('bytes_downloaded', len(img_data))
                         with Image.open(io.BytesIO(img_data)) as img_test:
                             img_test.verify()
                         img_path = os.path.join(output_dir, f"{query}_{downloaded}.jpg")
@@ -627,6 +1532,72 @@ class VideoCreatorApp:
             return downloaded
         return downloaded
 
+    def compute_image_signature(self, img_path, hash_size=8, sample_size=512):
+        """Return (difference hash bits, pixel count, sharpness) for one candidate image."""
+        with Image.open(img_path) as img:
+            width, height = img.size
+            # Let the JPEG decoder downscale while decoding; we only need a small grayscale sample
+            img.draft("L", (sample_size, sample_size))
+            gray = img.convert("L")
+            gray.thumbnail((sample_size, sample_size))
+            sample = np.asarray(gray, dtype=np.float32)
+            small = np.asarray(gray.resize((hash_size + 1, hash_size), Image.LANCZOS), dtype=np.float32)
+        dhash = (small[:, 1:] > small[:, :-1]).ravel()
+        # Variance of the Laplacian is a cheap focus/blur measure
+        laplacian = (sample[1:-1, :-2] + sample[1:-1, 2:] + sample[:-2, 1:-1] + sample[2:, 1:-1]
+                     - 4 * sample[1:-1, 1:-1])
+        sharpness = float(laplacian.var()) if laplacian.size else 0.0
+        return dhash, width * height, sharpness
+
+    def select_candidate_images(self, image_folder, max_images=5, min_pixels=640 * 360, max_hash_distance=10):
+        """Drop near-duplicate and low quality candidates so only the best images get preprocessed and rendered."""
+        candidates, hashes, pixels, sharpness = [], [], [], []
+        for f in sorted(os.listdir(image_folder)):
+            if not f.lower().endswith(('.png', '.jpg', '.jpeg')):
+                continue
+            img_path = os.path.join(image_folder, f)
+            try:
+                dhash, pixel_count, sharp = self.compute_image_signature(img_path)
+            except Exception as e:
+                logging.warning(f"Could not score candidate image {img_path}: {str(e)}")
+                try:
+                    os.remove(img_path)
+                except OSError as e:
+                    logging.warning(f"Could not remove unreadable image {img_path}: {str(e)}")
+                continue
+            candidates.append(img_path)
+            hashes.append(dhash)
+            pixels.append(pixel_count)
+            sharpness.append(sharp)
+        if not candidates:
+            return []
+        hashes = np.stack(hashes)
+        pixels = np.asarray(pixels, dtype=np.float64)
+        sharpness = np.asarray(sharpness, dtype=np.float64)
+        # Pairwise Hamming distances between all perceptual hashes in one shot
+        distances = np.count_nonzero(hashes[:, None, :] != hashes[None, :, :], axis=-1)
+        resolution_score = np.log1p(pixels) / np.log1p(pixels).max()
+        sharpness_score = np.log1p(sharpness) / max(np.log1p(sharpness).max(), 1e-6)
+        scores = 0.5 * resolution_score + 0.5 * sharpness_score
+        # Tiny images are only kept if nothing else is available
+        scores[pixels < min_pixels] -= 1.0
+        selected = []
+        for idx in np.argsort(-scores, kind="stable"):
+            if len(selected) >= max_images:
+                break
+            if selected and distances[idx, selected].min() <= max_hash_distance:
+                logging.info(f"Skipping near-duplicate image {candidates[idx]}")
+                continue
+            selected.append(int(idx))
+        for idx, img_path in enumerate(candidates):
+            if idx not in selected:
+                try:
+                    os.remove(img_path)
+                except OSError as e:
+                    logging.warning(f"Could not remove rejected image {img_path}: {str(e)}")
+        logging.info(f"Selected {len(selected)} of {len(candidates)} candidate images")
+        return [candidates[idx] for idx in selected]
+
     def create_fallback_image(self, term, output_dir):
         try:
             img = Image.new('RGB', (1920, 1080), color=(30, 30, 40))
@@ -658,27 +1629,40 @@ class VideoCreatorApp:
             image_files = self.get_valid_images(image_folder)
             if not image_files:
                 raise ValueError("No valid images available for video creation")
-            output_path = self.get_output_path()
+            targets = self.get_output_targets()
+            output_path = targets[0][0]
+            from moviepy import AudioFileClip
             try:
+                # Only the duration is needed here; ffmpeg reads the audio straight from disk when muxing
                 audio_clip = AudioFileClip(audio_file)
                 total_duration = audio_clip.duration
+                audio_clip.close()
             except Exception as e:
                 raise ValueError(f"Invalid audio file: {str(e)}")
             duration_per_image = max(self.img_duration_var.get(), total_duration / len(image_files))
-            clips = self.create_video_clips(image_files, duration_per_image)
-            if not clips:
-                raise ValueError("Could not create any valid video clips")
-            final_video = CompositeVideoClip(clips, method="compose")
+            single_output = len(targets) == 1 and targets[0][1] == OUTPUT_FORMATS[DEFAULT_OUTPUT_FORMAT][:2]
+            slideshow = StreamingSlideshow(
+                sorted(image_files),
+                duration_per_image,
+                size=(1920, 1080) if single_output else master_canvas_size([size for _, size in targets]),
+                zoom=self.zoom_var.get(),
+                transition=self.transition_combo.get()
+            )
             try:
-                final_video = final_video.set_audio(audio_clip)
-            except AttributeError:
-                final_video.audio = audio_clip
-            self.write_video_file(final_video, output_path)
+                if single_output:
+                    self.render_single_output(slideshow, output_path, audio_file)
+                else:
+                    self.render_multi_output(slideshow, targets, audio_file)
+            finally:
+                slideshow.close()
             return output_path
+        except RenderCancelled:
+            raise
         except Exception as e:
             raise Exception(f"Video creation failed: {str(e)}")
 
     def get_valid_images(self, image_folder):
+        from moviepy import ImageSequenceClip
         valid_images = []
         for f in os.listdir(image_folder):
             if f.lower().endswith(('.png', '.jpg', '.jpeg')):
@@ -699,97 +1683,143 @@ class VideoCreatorApp:
                     continue
         return valid_images
 
-    def get_output_path(self):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def get_output_path(self, suffix="", timestamp=None):
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
         content_type = self.content_type_combo.get().replace(" ", "_")
-        output_filename = f"AI_Video_{content_type}_{timestamp}.mp4"
+        output_filename = f"AI_Video_{content_type}_{timestamp}{suffix}.mp4"
         return os.path.join(self.output_var.get(), output_filename)
 
-    def create_video_clips(self, image_files, duration_per_image):
-        clips = []
-        transition = self.transition_combo.get()
-        for i, img in enumerate(sorted(image_files)):
-            if not self.running:
-                break
-            try:
-                # Create a basic clip
-                img_clip = ImageSequenceClip([img], durations=[duration_per_image])
-                img_clip = img_clip.resize(height=1080)
-
-                # Apply zoom effect
-                zoom_duration = duration_per_image * 0.8
-                zoom_factor = self.zoom_var.get()
-                zoomed_clip = img_clip.fl_time(lambda t: min(t, zoom_duration))
-                zoomed_clip = zoomed_clip.fx(vfx.zoom_in, 
-                                           factor=zoom_factor,
-                                           zoom_center=(0.5, 0.5))
-
-                # Apply transitions
-                if i > 0 and transition != "None":
-                    if transition == "Crossfade":
-                        zoomed_clip = zoomed_clip.crossfadein(0.5)
-                    elif transition == "Fade to Black":
-                        if clips:
-                            clips[-1] = clips[-1].fx(vfx.fadeout, 0.5)
-                        zoomed_clip = zoomed_clip.fx(vfx.fadein, 0.5)
-                    elif transition == "Slide":
-                        # Simple slide effect (left to right)
-                        zoomed_clip = zoomed_clip.fx(vfx.slide_in, 0.5, 'left')
-
-                clips.append(zoomed_clip)
-            except Exception as e:
-                logging.warning(f"Error processing {img}: {str(e)}")
-                # Skip problematic images instead of failing entirely
-                continue
+    def get_output_targets(self):
+        """(output path, (width, height)) for each selected format; the first one is uploaded."""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        selected = [name for name in OUTPUT_FORMATS if self.format_vars[name].get()] or [DEFAULT_OUTPUT_FORMAT]
+        return [(self.get_output_path(OUTPUT_FORMATS[name][2], timestamp), OUTPUT_FORMATS[name][:2]) for name in selected]
+
+    def check_render_cancelled(self, frame_index):
+        """Handle pending Tk events every few frames and stop the render if Cancel was clicked."""
+        if frame_index % CANCEL_POLL_FRAMES == 0:
+            self.root.update()
+        if not self.running:
+            raise RenderCancelled("Process cancelled")
 
-        if not clips:
-            raise ValueError("No valid video clips were created")
-        return clips
+    def render_single_output(self, slideshow, output_path, audio_file):
+        from moviepy import VideoClip
+        frame_counter = itertools.count()
 
-    def write_video_file(self, final_video, output_path):
+        def make_frame(t):
+            self.check_render_cancelled(next(frame_counter))
+            return slideshow.make_frame(t)
+
+        final_video = VideoClip(make_frame, duration=slideshow.duration)
         try:
-            final_video.write_videofile(
-                output_path,
-                fps=24,
-                codec="libx264",
-                audio_codec="aac",
-                threads=4,
-                bitrate="8000k",
-                preset='slow',
-                ffmpeg_params=[
-                    '-crf', '18',
-                    '-pix_fmt', 'yuv420p',
-                    '-movflags', '+faststart'
-                ]
-            )
-        except Exception as e:
-            logging.warning(f"High quality render failed, trying faster settings: {str(e)}")
-            final_video.write_videofile(
-                output_path,
-                fps=24,
-                codec="libx264",
-                audio_codec="aac",
-                threads=2,
-                preset='fast',
-                ffmpeg_params=['-crf', '23']
-            )
+            self.write_video_file(final_video, output_path, audio=audio_file)
+        finally:
+            final_video.close()
+
+    def render_multi_output(self, slideshow, targets, audio_file, fps=24):
+        frame_count = int(slideshow.duration * fps)
+        start = time.perf_counter()
+        with self.metrics.stage("write_video_file"), self.render_profiler(targets[0][0]):
+            for attempt, profile in enumerate(ENCODER_PROFILES):
+                writer = MultiFormatWriter(targets, slideshow.size, fps=fps, audio_file=audio_file, profile=profile)
+                try:
+                    writer.start()
+                    try:
+                        for i in range(frame_count):
+                            self.check_render_cancelled(i)
+                            writer.write_frame(slideshow.make_frame(i / fps))
+                    finally:
+                        writer.close()
+                    break
+                except RenderCancelled:
+                    raise
+                except Exception as e:
+                    if attempt == len(ENCODER_PROFILES) - 1:
+                        raise
+                    logging.warning(f"High quality render failed, trying faster settings: {str(e)}")
+        self.metrics.record_render(frame_count, time.perf_counter() - start)
+        for output_path, size in targets:
+            logging.info(f"Rendered {size[0]}x{size[1]} output: {output_path}")
+
+    @contextmanager
+    def render_profiler(self, output_path):
+        if not self.profile_render:
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(f"{output_path}.prof")
+            logging.info(f"Render profile written to {output_path}.prof")
+
+    def write_video_file(self, final_video, output_path, fps=24, audio=True):
+        start = time.perf_counter()
+        with self.metrics.stage("write_video_file"), self.render_profiler(output_path):
+            for attempt, profile in enumerate(ENCODER_PROFILES):
+                try:
+                    final_video.write_videofile(
+                        output_path,
+                        fps=fps,
+                        codec="libx264",
+                        audio=audio,
+                        audio_codec="aac",
+                        threads=profile['threads'],
+                        bitrate=profile['bitrate'],
+                        preset=profile['preset'],
+                        ffmpeg_params=['-crf', profile['crf']] + profile['ffmpeg_params']
+                    )
+                    break
+                except RenderCancelled:
+                    raise
+                except Exception as e:
+                    if attempt == len(ENCODER_PROFILES) - 1:
+                        raise
+                    logging.warning(f"High quality render failed, trying faster settings: {str(e)}")
+        self.metrics.record_render(int(final_video.duration * fps), time.perf_counter() - start)
 
     def upload_to_youtube(self, video_path):
         try:
-            if not self.youtube_api:
-                self.youtube_api = YouTubeAPI()
             title = f"AI Generated {self.content_type_combo.get()} Video - {datetime.now().strftime('%Y-%m-%d')}"
             description = f"This video was created using AI Content Creator Pro.\n\nContent Type: {self.content_type_combo.get()}\nStyle: {self.style_combo.get()}\nDuration: {self.duration_combo.get()}"
-            response = self.youtube_api.upload_video(
+            self.upload_manager.submit(
                 file_path=video_path,
                 title=title,
                 description=description,
                 category_id='22',
-                privacy_status='private'
+                privacy_status='private',
+                metrics=self.metrics
             )
-            self.show_success(f"Video uploaded to YouTube successfully!\nVideo ID: {response['id']}")
         except Exception as e:
-            self.show_error(f"Failed to upload to YouTube: {str(e)}")
+            self.show_error(f"Failed to queue YouTube upload: {str(e)}")
+
+    def poll_upload_events(self):
+        try:
+            while True:
+                kind, file_path, payload = self.upload_manager.events.get_nowait()
+                name = os.path.basename(file_path)
+                if kind == 'progress':
+                    self.update_status(f"Uploading {name}: {int(payload * 100)}%")
+                elif kind == 'done':
+                    message = f"Video uploaded to YouTube successfully!\nVideo ID: {payload}"
+                    # Don't interrupt a render that is in progress with a dialog
+                    if self.running:
+                        logging.info(message)
+                        self.update_status(message.replace("\n", " "))
+                    else:
+                        self.show_success(message)
+                elif kind == 'error':
+                    message = f"Failed to upload {name} to YouTube (will resume on next start): {payload}"
+                    if self.running:
+                        logging.error(message)
+                        self.update_status(f"Error: {message}")
+                    else:
+                        self.show_error(message)
+        except queue.Empty:
+            pass
+        self.root.after(500, self.poll_upload_events)
 
     def cleanup_temp_files(self, image_folder, audio_path, processed_image_folder=None):
         try: